@@ -1,70 +1,237 @@
+import asyncio
+import heapq
+import logging
 from functools import lru_cache
+from operator import attrgetter
+from pathlib import Path
 
-from langchain_community.vectorstores import FAISS
+import numba
+import numpy as np
 from langchain_core.documents import Document
+from usearch.index import Index
 
-# embeddings used to convert text to vectors for FAISS.  change to another
+# embeddings used to convert text to vectors for the index.  change to another
 # provider if desired (HuggingFace, Cohere, etc.).
 from langchain_openai import OpenAIEmbeddings
 
-# the LLM and structured output helpers used by ``text_to_cypher``
-from langchain_openai import OpenAI
-from langchain_core.output_parsers import PydanticOutputParser
+# the LLM used by ``text_to_cypher``
+from langchain_openai import ChatOpenAI
 
 from .models import SearchResult, CypherQuery
 
+logger = logging.getLogger(__name__)
+
+
+
+# memoized cypher translations keyed by the normalized query text.  Entries
+# carry an expiry deadline so stale translations age out; the lock keeps
+# concurrent requests for the same query from racing on the dict.
+_CYPHER_CACHE: dict[str, tuple[float, CypherQuery]] = {}
+_CYPHER_CACHE_TTL = 300.0  # seconds
+_CYPHER_CACHE_MAX = 2048
+_CYPHER_CACHE_LOCK = asyncio.Lock()
 
 
 async def text_to_cypher(text: str) -> CypherQuery | None:
+    """Convert *text* to a :class:`CypherQuery`, memoizing successful results.
+
+    Queries repeat a lot in practice, and each translation is a full LLM
+    round-trip; identical (whitespace/case-normalized) queries within the TTL
+    reuse the previous translation.  Failures are not cached so a transient
+    provider problem does not poison later requests.
+    """
+    key = " ".join(text.lower().split())
+    now = asyncio.get_running_loop().time()
+    async with _CYPHER_CACHE_LOCK:
+        cached = _CYPHER_CACHE.get(key)
+        if cached is not None:
+            deadline, value = cached
+            if deadline > now:
+                return value
+            del _CYPHER_CACHE[key]
+
+    result = await _translate_to_cypher(text)
+    if result is not None:
+        async with _CYPHER_CACHE_LOCK:
+            if len(_CYPHER_CACHE) >= _CYPHER_CACHE_MAX:
+                # drop the oldest insertion; good enough for a simple cap.
+                _CYPHER_CACHE.pop(next(iter(_CYPHER_CACHE)))
+            _CYPHER_CACHE[key] = (now + _CYPHER_CACHE_TTL, result)
+    return result
+
+
+# the static part of the translation prompt, built once at import time; per
+# call we only append the query text.
+_CYPHER_PROMPT_PREFIX = (
+    "Convert the following natural-language query to a Cypher query.\n\nInput: "
+)
+
+# the structured-output LLM client, created lazily on first use and reused for
+# every call afterwards.  Construction is deferred (not done at import) because
+# ChatOpenAI raises when no API key is configured, and the module must stay
+# importable in that development setup.
+_CYPHER_LLM = None
+
+
+async def _translate_to_cypher(text: str) -> CypherQuery | None:
     """Convert a natural language text query into a :class:`CypherQuery`.
 
-    This prototype uses an LLM together with ``PydanticOutputParser`` so that
-    the model return value is parsed into a :class:`CypherQuery` instance.  The
-    underlying prompt instructs the model to emit JSON conforming to the
-    schema generated from that Pydantic class; ``with_structured_output`` is
-    handled implicitly by using the parser directly.
+    Uses the provider's native structured-output support so the model is
+    constrained to the :class:`CypherQuery` schema directly, instead of asking
+    for free-form JSON and hoping it parses.  That removes the parse-failure
+    path that used to waste whole LLM calls.
 
     If the model fails (e.g. no API key) we swallow the exception and return
     ``None`` so that callers can continue using vector search alone.
     """
-    # build an LLM instance (synchronous or async; ``apredict`` returns awaited
-    # result).  Configuration (model name, api key) is handled by environment
-    # variables or other upstream configuration.
-    llm = OpenAI()
-
-    parser = PydanticOutputParser(pydantic_object=CypherQuery)
-
-    prompt = (
-        "Convert the following natural-language query to a Cypher query. "
-        "Return your answer as JSON matching this schema:\n" + parser.schema + "\n\n"
-        f"Input: {text}"
-    )
-
+    global _CYPHER_LLM
     try:
-        raw = await llm.apredict(prompt)
-        parsed = parser.parse(raw)
-        return parsed
+        if _CYPHER_LLM is None:
+            # configuration (api key etc.) is handled by environment variables
+            # or other upstream configuration.
+            _CYPHER_LLM = ChatOpenAI(model="gpt-4o-mini").with_structured_output(
+                CypherQuery
+            )
+        return await _CYPHER_LLM.ainvoke(_CYPHER_PROMPT_PREFIX + text)
     except Exception:
         # during development we may not have a configured provider; return None
         # to indicate that no cypher query could be produced.
         return None
 
 
-@lru_cache()
-def load_FAISS(documents: tuple[Document, ...]) -> FAISS:
-    """Return a FAISS vector store built from the provided documents.
+# directory where corpus embeddings are persisted between restarts; each
+# document set gets its own .npy file named after its content fingerprint, so a
+# changed corpus simply embeds (and saves) fresh vectors.  Rebuilding the
+# USearch index itself from saved vectors is cheap.
+_EMBEDDINGS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "embeddings"
+
+# the exact-search index over the active document set, built once at
+# application startup so the request path never pays for corpus embedding.
+# USearch keys are positions into the document list passed to ``init_index``.
+_INDEX: Index | None = None
+
+
+class EmbedBatcher:
+    """Coalesce concurrent embedding requests into batched API calls.
+
+    Each incoming query normally costs one HTTP round-trip to the embeddings
+    provider.  Under load many such calls are in flight at once; the provider
+    accepts up to 2048 inputs per request, so batching them is nearly free
+    latency-wise and divides the per-request overhead by the batch size.
+
+    ``embed`` enqueues the text with a future and a background task drains the
+    queue, waiting at most ``max_delay_ms`` for stragglers before issuing one
+    ``aembed_documents`` call and fanning the vectors back out.
+    """
+
+    def __init__(
+        self,
+        embeddings: OpenAIEmbeddings,
+        *,
+        max_batch: int = 64,
+        max_delay_ms: float = 5.0,
+    ) -> None:
+        self._embeddings = embeddings
+        self._max_batch = max_batch
+        self._max_delay = max_delay_ms / 1000.0
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future]] = asyncio.Queue()
+        self._drain_task: asyncio.Task | None = None
+
+    async def embed(self, text: str) -> list[float]:
+        """Return the embedding vector for *text*, possibly batched."""
+        loop = asyncio.get_running_loop()
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = loop.create_task(self._drain())
+        future: asyncio.Future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await self._embeddings.aembed_documents(
+                    [text for text, _ in batch]
+                )
+            except Exception as exc:  # fan the failure out to every waiter
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+# batcher for query embeddings, created alongside the index at startup.
+_BATCHER: EmbedBatcher | None = None
+
+
+def init_index(key: str, documents: list[Document]) -> Index | None:
+    """Build the USearch index for the given documents.
 
-    The list of documents is converted to a tuple so that it can be cached by
-    ``lru_cache``.  The embeddings object is created once and reused by FAISS
-    internally.  This function will construct the index on first call and
-    return the same ``FAISS`` instance for subsequent invocations with the
-    *same* document tuple.
+    Called from the router's startup handler.  If persisted vectors matching
+    ``key`` exist they are loaded, avoiding a re-embedding round-trip to the
+    provider; otherwise the corpus is embedded once and the vectors saved for
+    subsequent boots.  USearch does exact cosine search with SIMD-accelerated
+    distance kernels, which beats a full vector-store stack for a corpus this
+    size.
+
+    Like the cypher LLM, the embeddings provider may be unconfigured during
+    development (no API key); in that case we log and leave the index unset so
+    the application still boots and ``search_documents`` degrades to empty
+    results instead of startup failing.
     """
-    # build embeddings and vectorstore; this will call out to an LLM provider if
-    # using OpenAIEmbeddings.  In a real application you'd configure which
-    # embeddings class to use via dependency injection or settings.
-    embeddings = OpenAIEmbeddings()
-    return FAISS.from_documents(list(documents), embeddings)
+    global _INDEX, _BATCHER
+    try:
+        # build embeddings; this will call out to an LLM provider if using
+        # OpenAIEmbeddings.  In a real application you'd configure which
+        # embeddings class to use via dependency injection or settings.
+        embeddings = OpenAIEmbeddings()
+
+        vectors_path = _EMBEDDINGS_DIR / f"{key}.npy"
+        if vectors_path.exists():
+            vectors = np.load(vectors_path)
+        else:
+            vectors = np.asarray(
+                embeddings.embed_documents([d.page_content for d in documents]),
+                dtype=np.float32,
+            )
+            _EMBEDDINGS_DIR.mkdir(parents=True, exist_ok=True)
+            np.save(vectors_path, vectors)
+
+        # store vectors half-precision: exact search is memory-bandwidth-bound
+        # and fp16 halves the bytes moved per query.  Queries stay fp32; the
+        # SIMD distance kernels handle the mixed precision, and cosine ranking
+        # is insensitive to the precision loss.
+        index = Index(ndim=vectors.shape[1], metric="cos", dtype="f16")
+        index.add(np.arange(len(documents)), vectors)
+    except Exception:
+        logger.warning(
+            "vector index unavailable; /search will return empty results",
+            exc_info=True,
+        )
+        _INDEX = None
+        _BATCHER = None
+        return None
+
+    _BATCHER = EmbedBatcher(embeddings)
+    _INDEX = index
+    return _INDEX
 
 
 def search_knowledgegraph(cypher_query: CypherQuery) -> list[SearchResult]:
@@ -82,58 +249,163 @@ def search_knowledgegraph(cypher_query: CypherQuery) -> list[SearchResult]:
     ]
 
 
-def _lexical_score(query: str, content: str) -> float:
-    """Return a simple score based on how often the query terms appear in the
-    document content.  This is intentionally naive but works well enough for a
-    small in‑memory corpus.
+# BM25 parameters; the usual defaults work fine for a small corpus.
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+# vocabulary (token -> column index) and precomputed BM25 weight matrix of
+# shape (n_documents, n_terms), both built once at startup by ``init_lexical``.
+_VOCAB: dict[str, int] = {}
+_BM25_WEIGHTS: np.ndarray | None = None
+
+
+def init_lexical(documents: list[Document]) -> None:
+    """Precompute the BM25 term-document weight matrix for *documents*.
+
+    Tokenization is the same whitespace/lowercase split the old per-request
+    scorer used, but it now happens exactly once.  Scoring a query afterwards
+    is a column slice plus a sum rather than a Python loop over every document.
+    """
+    global _BM25_WEIGHTS
+    tokenized = [d.page_content.lower().split() for d in documents]
+    _query_cols.cache_clear()  # column indices are only valid per vocabulary
+    _VOCAB.clear()
+    for tokens in tokenized:
+        for token in tokens:
+            _VOCAB.setdefault(token, len(_VOCAB))
+
+    n_docs, n_terms = len(tokenized), len(_VOCAB)
+    tf = np.zeros((n_docs, n_terms), dtype=np.float32)
+    for i, tokens in enumerate(tokenized):
+        for token in tokens:
+            tf[i, _VOCAB[token]] += 1.0
+
+    doc_lens = tf.sum(axis=1)
+    avg_len = doc_lens.mean() if n_docs else 1.0
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+    norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * doc_lens / avg_len)
+    _BM25_WEIGHTS = (tf * (_BM25_K1 + 1.0) / (tf + norm[:, None])) * idf
 
-    The query is split on whitespace and each term is counted separately in a
-    case‑insensitive manner.  Documents that contain none of the terms receive a
-    score of 0 and are omitted from the final results.
+
+@lru_cache(maxsize=2048)
+def _query_cols(query: str) -> tuple[int, ...]:
+    """Tokenize *query* into vocabulary column indices, memoized.
+
+    Queries repeat often, so the lowercase/split/lookup work happens once per
+    distinct query string rather than on every call.
+    """
+    return tuple(_VOCAB[t] for t in query.lower().split() if t in _VOCAB)
+
+
+def _lexical_score(query: str) -> np.ndarray:
+    """Return a BM25 score per document for *query*.
+
+    The query is split on whitespace case-insensitively; terms outside the
+    corpus vocabulary contribute nothing.  The result is a vector of shape
+    (n_documents,) computed as a single slice/sum over the precomputed weight
+    matrix — no per-document Python work.
     """
-    query_lower = query.lower().strip()
-    if not query_lower:
-        return 0.0
+    if _BM25_WEIGHTS is None:
+        return np.zeros(0, dtype=np.float32)
 
-    terms = query_lower.split()
-    content_lower = content.lower()
-    score = 0
-    for term in terms:
-        score += content_lower.count(term)
-    return float(score)
+    cols = _query_cols(query)
+    if not cols:
+        return np.zeros(_BM25_WEIGHTS.shape[0], dtype=np.float32)
+    return _BM25_WEIGHTS[:, list(cols)].sum(axis=1)
 
 
-async def search_documents(query: str, documents: list[Document]) -> list[SearchResult]:
-    """Perform a two‑step search using FAISS and a (mock) knowledge graph.
+@numba.njit(cache=True)
+def _rank(dists: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Convert vector distances to similarity scores and select the top *k*.
+
+    Distances are non-negative with smaller meaning more similar, so the score
+    is ``1 / (1 + distance)``.  Selection uses ``argpartition`` (O(n)) followed
+    by a sort of only the surviving *k* entries; the whole kernel is compiled,
+    so no per-hit interpreter work remains.
+    """
+    scores = 1.0 / (1.0 + dists)
+    if k >= scores.shape[0]:
+        order = np.argsort(-scores)
+        return order, scores[order]
+    idx = np.argpartition(-scores, k)[:k]
+    order = idx[np.argsort(-scores[idx])]
+    return order, scores[order]
+
+
+async def search_documents(
+    query: str, documents: list[Document], *, top_k: int = 5
+) -> list[SearchResult]:
+    """Perform a two‑step search using the vector index and a (mock) knowledge graph.
 
     The provided *query* is treated as natural-language text.  It is used both
     for the vector similarity search and for conversion to a Cypher query that
-    can be executed against the (mock) knowledge graph.
+    can be executed against the (mock) knowledge graph.  ``top_k`` caps the
+    number of results returned.
 
-    The vector search returns results with a distance score; we convert that to
-    a similarity value so that higher numbers indicate better relevance.  If the
-    embedding call or cypher conversion fails during development, the function
-    degrades gracefully and still returns whatever vector hits were obtained.
+    The USearch index is built once at startup by :func:`init_index`; the
+    request path only embeds the query and searches.  The vector search returns
+    cosine distances; we convert those to a similarity value so that higher
+    numbers indicate better relevance.  If the embedding call or cypher
+    conversion fails during development, the function degrades gracefully and
+    still returns whatever vector hits were obtained.
     """
-    if not query:
+    if not query or _INDEX is None or _BATCHER is None:
         return []
 
-    store = load_FAISS(tuple(documents))
-    # request all documents to allow reranking outside the vector store
-    faiss_hits = store.similarity_search_with_score(query, k=len(documents))
+    index = _INDEX
+    # only ask the index for as many hits as can survive the final cut.
+    # Knowledge-graph results can only add candidates on top, so a vector hit
+    # ranked below top_k can never appear in the response; requesting more
+    # just wastes distance computations and allocations.
+    k_vec = min(len(documents), top_k)
+
+    async def _vector_search() -> tuple[np.ndarray, np.ndarray]:
+        # embed via the batcher (one API call shared across concurrent
+        # requests), then run the in-memory search off the event loop.
+        query_vec = np.asarray(await _BATCHER.embed(query), dtype=np.float32)
+        # exact=True takes the brute-force path: for a corpus this small it is
+        # a straight run of SIMD distance kernels over all vectors, with no
+        # graph traversal overhead.
+        matches = await asyncio.to_thread(index.search, query_vec, k_vec, exact=True)
+        return (
+            np.asarray(matches.keys),
+            np.asarray(matches.distances, dtype=np.float32),
+        )
 
+    # the vector search and the cypher translation are data-independent, so
+    # overlap them: end-to-end latency becomes max(T_vector, T_llm) instead of
+    # their sum.
+    vector_hits, cypher_obj = await asyncio.gather(
+        _vector_search(),
+        text_to_cypher(query),
+        return_exceptions=True,
+    )
+    if isinstance(vector_hits, BaseException):
+        # the vector search is the primary path; surface its failure as before.
+        raise vector_hits
+    if isinstance(cypher_obj, BaseException):
+        # text_to_cypher already degrades to None internally; treat anything
+        # that still escaped (e.g. cancellation artifacts) the same way.
+        cypher_obj = None
+
+    ids, distances = vector_hits
     results: list[SearchResult] = []
-    for doc, distance in faiss_hits:
-        # transform distance to a pseudo-score; FAISS distances are non-negative
-        # with smaller meaning more similar, so we invert.
-        results.append(SearchResult(document=doc, score=1.0 / (1 + distance)))
-
-    # attempt cypher transformation to augment results; if we get a
-    # CypherQuery back we hand it to the KG search helper.  failures are
-    # ignored so the vector results are still returned.
-    cypher_obj = await text_to_cypher(query)
+    if ids.size:
+        order, scores = _rank(distances, top_k)
+        # only the surviving top_k hits become SearchResult objects
+        results = [
+            SearchResult(document=documents[int(ids[i])], score=float(s))
+            for i, s in zip(order, scores)
+        ]
+
+    # if the cypher transformation produced a CypherQuery we hand it to the KG
+    # search helper.  failures are ignored so the vector results are still
+    # returned.
     if cypher_obj is not None:
         results.extend(search_knowledgegraph(cypher_obj))
 
-    results.sort(key=lambda r: r.score, reverse=True)
-    return results
+    # select the top_k of the combined vector + KG results with a bounded
+    # heap: the candidate pool is only top_k vector hits plus the KG extras,
+    # so nlargest keeps k entries live instead of materializing score arrays.
+    return heapq.nlargest(top_k, results, key=attrgetter("score"))
@@ -1,12 +1,22 @@
+from dataclasses import dataclass
 from datetime import datetime
 
 from langchain_core.documents import Document
 from pydantic import BaseModel, Field
 
 
-class SearchResult(BaseModel):
+@dataclass(slots=True)
+class SearchResult:
+    """A single search hit.
+
+    A plain dataclass rather than a ``BaseModel``: results are constructed in
+    the ranking hot loop, and skipping per-instance validation there matters.
+    FastAPI still validates/serializes at the response boundary.  Scores are
+    always computed non-negative internally.
+    """
+
     document: Document
-    score: float = Field(..., ge=0)
+    score: float
     reason: str | None = None
 
 
@@ -1,23 +1,47 @@
+import hashlib
+from collections import deque
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 
 from .data import DOCUMENTS  # noqa: F401
 from .models import SearchEntry, SearchRequest, SearchResult
-from .integrations import search_documents
+from .integrations import init_index, init_lexical, search_documents
 
 router = APIRouter(prefix="/search", tags=["search"])
-SEARCH_HISTORY: list[SearchEntry] = []
+# bounded so the history cannot grow without limit over a long-lived process.
+SEARCH_HISTORY: deque[SearchEntry] = deque(maxlen=10_000)
+
+
+def _record_query(query: str) -> None:
+    """Append *query* to the search history; runs as a background task."""
+    SEARCH_HISTORY.append(SearchEntry(query=query, timestamp=datetime.utcnow()))
+
+# stable fingerprint of the document set, computed once at import time.  Used
+# by the integration layer to cache the vector index without hashing every
+# Document on each request.
+_DOCS_KEY = hashlib.blake2b(
+    b"\0".join(d.page_content.encode("utf-8") for d in DOCUMENTS)
+).hexdigest()
+
+
+@router.on_event("startup")
+async def _build_index() -> None:
+    """Build (or load) the vector index eagerly so requests never pay for it."""
+    init_index(_DOCS_KEY, DOCUMENTS)
+    init_lexical(DOCUMENTS)
 
 
 @router.post("", response_model=list[SearchResult])
-async def search(request: SearchRequest) -> list[SearchResult]:
+async def search(
+    request: SearchRequest, background_tasks: BackgroundTasks
+) -> list[SearchResult]:
     """
     Search over the in-memory DOCUMENTS collection.
 
     The implementation is intentionally straightforward:
     1. normalize the query and ensure it is not empty
-    2. record the query in our history list
+    2. schedule recording of the query in our history after the response
     3. call ``search_documents`` to score every document
     4. return the top ``request.top_k`` results, ordered by score (descending)
 
@@ -29,8 +53,9 @@ async def search(request: SearchRequest) -> list[SearchResult]:
         raise HTTPException(status_code=400, detail="Query must not be empty.")
 
     # keep track of what people have asked for (could be exposed via another
-    # endpoint or persisted later)
-    SEARCH_HISTORY.append(SearchEntry(query=query, timestamp=datetime.utcnow()))
+    # endpoint or persisted later); done after the response is sent so the
+    # SearchEntry construction/validation stays off the critical path.
+    background_tasks.add_task(_record_query, query)
 
     # ask the integration to return only the requested number of hits
     results = await search_documents(query, DOCUMENTS, top_k=request.top_k)